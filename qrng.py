@@ -1,19 +1,47 @@
+import glob
+import hashlib
 import math
 import mthree
-import random
+import numpy as np
+import os
+import tempfile
+import time
 
-from qiskit import QuantumCircuit
+from concurrent.futures import ThreadPoolExecutor
+from qiskit import QuantumCircuit, qpy
 from qiskit_aer import AerSimulator
 from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
 from qiskit_ibm_runtime import SamplerV2 as Sampler, QiskitRuntimeService, IBMBackend
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 # QuantumRandomNumberGenerator
 # This class generates random numbers using quantum circuits with Qiskit.
 # It can apply error mitigation for higher fidelity results.
 # The class requires an IBMQ token to access IBM's quantum resources.
 
+# Directory where transpiled circuits are persisted across sessions
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "qrng")
+
+# Fixed transpiler seed and optimization level, so that transpiled circuits are reproducible and can be cached
+TRANSPILER_SEED = 1024
+OPTIMIZATION_LEVEL = 1
+
+# M3 calibration files older than this many hours are ignored and the calibration is redone
+CALIBRATION_MAX_AGE_HOURS = 6
+
+# Simulator jobs running at the same time; each job already uses every CPU core, so more would oversubscribe them
+MAX_CONCURRENT_JOBS = 2
+
+# Aer simulator, Sampler and M3 mitigator shared by every generator using the same backend name
+_BACKEND_CACHE: Dict[str, Tuple[AerSimulator, Sampler, mthree.M3Mitigation]] = {}
+
+# QiskitRuntimeService shared by every generator
+_SERVICE_SINGLETON = None
+
 class QuantumRandomNumberGenerator:
+    # Transpiled circuits and their M3 mappings, keyed by (backend, target fingerprint, num_qubits, optimization_level, seed)
+    _TRANSPILE_CACHE: Dict[tuple, Tuple[QuantumCircuit, Dict]] = {}
+    
     def __init__(self,num_possible_outcomes,api_token='YOUR-IBMQ-TOKEN',backend="ibm_sherbrooke") -> None:
         """
         Initialize the QuantumRandomNumberGenerator.
@@ -22,28 +50,47 @@ class QuantumRandomNumberGenerator:
         num_possible_outcomes (int): Number of possible outcomes for random numbers.
         api_token (str): IBMQ token for accessing the quantum backends.
         backend (str): Backend name to use for the Aer simulator and noise model.
+        
+        Raises:
+        ValueError: If `num_possible_outcomes` is smaller than 1.
         """
+        if num_possible_outcomes < 1:
+            raise ValueError("Number of possible outcomes must be at least 1.")
+        
         self.num_possible_outcomes = num_possible_outcomes
-        self.num_qubits = math.ceil(math.log2(self.num_possible_outcomes)) # `num_qubits` calculates the minimum number of qubits required to represent all possible outcomes.
+        self.num_qubits = max(1, (self.num_possible_outcomes - 1).bit_length()) # `num_qubits` calculates the minimum number of qubits required to represent all possible outcomes.
         self.api_token = api_token
-        self.max_number_bin = format(self.num_possible_outcomes, f'0{self.num_qubits}b')
+        self._cutoff = self.num_possible_outcomes # Outcomes 0, ..., num_possible_outcomes - 1 are accepted
+        self._rng = np.random.default_rng() # Random generator used for the error mitigation permutations
+        self.backend_name = backend
         
-        # Attempt to initialize QiskitRuntimeService; will prompt for API setup if unsuccessful
-        try:
-            self.service = QiskitRuntimeService()
-        except Exception:
+        global _SERVICE_SINGLETON
+        
+        # Attempt to initialize QiskitRuntimeService once per session; will prompt for API setup if unsuccessful
+        if _SERVICE_SINGLETON is None:
             try:
-                self._log_into_qiskit_runtime()
+                _SERVICE_SINGLETON = QiskitRuntimeService()
             except Exception:
-                print("Please configure your IBMQ token. You can obtain it by signing up at quantum.ibm.com")
+                try:
+                    self._log_into_qiskit_runtime()
+                    _SERVICE_SINGLETON = QiskitRuntimeService()
+                except Exception:
+                    print("Please configure your IBMQ token. You can obtain it by signing up at quantum.ibm.com")
+        self.service = _SERVICE_SINGLETON
+        
+        if backend not in _BACKEND_CACHE:
+            # Backend setup: `real_backend` is used for noise modeling, mapped to Aer simulator as `aer`
+            real_backend = self.service.backend(backend)
+            
+            # Aer already spreads the shots of a PUB over all CPU cores; also let it run the PUBs of a batched submission in parallel
+            aer = AerSimulator.from_backend(real_backend, max_parallel_experiments=0)
             
-        # Backend setup: `real_backend` is used for noise modeling, mapped to Aer simulator as `aer`
-        real_backend = self.service.backend(backend)
-        aer = AerSimulator.from_backend(real_backend)
+            # Initialize the Sampler and M3Mitigation instances, which will manage circuit sampling and measurement error mitigation
+            _BACKEND_CACHE[backend] = (aer, Sampler(mode=aer), mthree.M3Mitigation(aer))
         
-        # Initialize the Sampler and M3Mitigation instances, which will manage circuit sampling and measurement error mitigation
-        self.sampler = Sampler(mode=aer)
-        self.mit = mthree.M3Mitigation(aer)
+        # Reuse the simulator, sampler and mitigator already built for this backend, avoiding reloading the noise model
+        aer, self.sampler, self.mit = _BACKEND_CACHE[backend]
+        self._target_fingerprint = self._fingerprint_target(aer.target)
         
         self.single_circuit = False
         
@@ -56,20 +103,17 @@ class QuantumRandomNumberGenerator:
             qc = QuantumCircuit(self.num_qubits)
             
             # Add a Hadamard gates to all qubits and measure
-            for qubit in range(self.num_qubits):
-                qc.h(qubit)
+            qc.h(range(self.num_qubits))
             qc.measure_all()
             
             self.main_correction_permutations = 2**self.num_qubits
             
             # Initialize pass manager with aer backend
-            self.pm = generate_preset_pass_manager(backend=aer, optimization_level=1)
+            self.pm = generate_preset_pass_manager(backend=aer, optimization_level=OPTIMIZATION_LEVEL, seed_transpiler=TRANSPILER_SEED)
             
-            # Transpile the circuit to the corresponding backend
-            self.transpiled_qc = self.pm.run(qc)
-
-            # Map measurements for error mitigation, linking qubit measurement positions
-            self.qc_mapping = mthree.utils.final_measurement_mapping(self.transpiled_qc)
+            # Transpile the circuit to the corresponding backend and map measurements for error mitigation,
+            # linking qubit measurement positions
+            self.transpiled_qc, self.qc_mapping = self._transpile_cached(qc)
 
         else:
             # Divide the circuit if we need more than 10 qubits
@@ -81,20 +125,16 @@ class QuantumRandomNumberGenerator:
             qc = QuantumCircuit(10)
             
             # Add a Hadamard gates to all qubits and measure
-            for qubit in range(10):
-                qc.h(qubit)
+            qc.h(range(10))
             qc.measure_all()
             
             self.main_correction_permutations = 1024 # == 2**10
             
             # Initialize pass manager with aer backend
-            self.pm = generate_preset_pass_manager(backend=aer, optimization_level=1)
+            self.pm = generate_preset_pass_manager(backend=aer, optimization_level=OPTIMIZATION_LEVEL, seed_transpiler=TRANSPILER_SEED)
             
-            # Transpile the circuit to the corresponding backend
-            self.transpiled_qc = self.pm.run(qc)
-
-            # Pass the transpiled circuit for mapping to the M3 requirements
-            self.qc_mapping = mthree.utils.final_measurement_mapping(self.transpiled_qc)
+            # Transpile the circuit to the corresponding backend and pass it for mapping to the M3 requirements
+            self.transpiled_qc, self.qc_mapping = self._transpile_cached(qc)
             
             self.remainder_circuits= False
             
@@ -105,18 +145,144 @@ class QuantumRandomNumberGenerator:
                 # Create a new circuit with remainder qubits
                 rem_qc = QuantumCircuit(remainder)
                 # Add a Hadamard gates to all qubits and measure
-                for qubit in range(remainder):
-                    rem_qc.h(qubit)
+                rem_qc.h(range(remainder))
                 rem_qc.measure_all()
                 
-                # Transpile the circuit to the corresponding backend
-                self.transpiled_rem_qc = self.pm.run(rem_qc)
-                
-                # Pass the transpiled circuit for mapping to the M3 requirements
-                self.rem_qc_mapping = mthree.utils.final_measurement_mapping(self.transpiled_rem_qc)
+                # Transpile the circuit to the corresponding backend and pass it for mapping to the M3 requirements
+                self.transpiled_rem_qc, self.rem_qc_mapping = self._transpile_cached(rem_qc)
                 
                 self.rem_correction_permutations = 2**remainder
+        
+        # Calibrate the M3 mitigator once for every mapping in use; the mappings are fixed for the
+        # transpiled circuits, so the calibration is reused by every subsequent run
+        cal_qubits = set(self.qc_mapping.values())
+        if not self.single_circuit and self.remainder_circuits:
+            cal_qubits |= set(self.rem_qc_mapping.values())
+        self._calibrate_mitigator(sorted(cal_qubits))
+
+
+    @staticmethod
+    def _fingerprint_target(target) -> str:
+        """
+        Summarize the error rates and durations of a backend target in a short hash.
+        The layout chosen by the transpiler depends on them, so the hash changes whenever the backend is recalibrated.
+        Parameters:
+            target (Target): Target of the Aer simulator.
+        Returns:
+            Hexadecimal fingerprint of the target.
+        """
+        properties = []
+        for name, qargs_properties in target.items():
+            for qargs, instruction_properties in (qargs_properties or {}).items():
+                if instruction_properties is not None:
+                    properties.append((name, qargs, instruction_properties.error, instruction_properties.duration))
+        return hashlib.sha1(repr(sorted(properties, key=repr)).encode()).hexdigest()[:12]
+
+    def _transpile_cached(self, qc: QuantumCircuit) -> Tuple[QuantumCircuit, Dict]:
+        """
+        Transpile a circuit with the pass manager, reusing earlier results when available.
+        Transpilation is deterministic for a fixed seed and backend calibration, so results are cached in memory and
+        persisted as QPY files in `CACHE_DIR`, keyed by backend, target fingerprint, number of qubits, optimization level and seed.
+        Parameters:
+            qc (QuantumCircuit): Hadamard circuit to transpile.
+        Returns:
+            Tuple with the transpiled circuit and its M3 measurement mapping.
+        """
+        key = (self.backend_name, self._target_fingerprint, qc.num_qubits, OPTIMIZATION_LEVEL, TRANSPILER_SEED)
+        if key in self._TRANSPILE_CACHE:
+            return self._TRANSPILE_CACHE[key]
+        
+        path = os.path.join(CACHE_DIR, "transpiled_{}_{}_{}q_o{}_s{}.qpy".format(*key))
+        transpiled_qc = None
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as file:
+                    transpiled_qc = qpy.load(file)[0]
+            except Exception:
+                transpiled_qc = None # Unreadable cache file (e.g. written by another Qiskit version), transpile again
+        
+        if transpiled_qc is None:
+            transpiled_qc = self.pm.run(qc)
+            
+            # Persisting is best-effort: an unwritable cache directory only costs the transpilation next session.
+            # The file is written under a temporary name and moved into place, so readers never see it half-written
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "wb") as file:
+                        qpy.dump(transpiled_qc, file)
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    os.remove(tmp_path)
+                    raise
+                
+                # Circuits transpiled for earlier calibrations of this backend will not be used again
+                fingerprint_glob = "?" * len(self._target_fingerprint)
+                self._prune_cache(os.path.join(CACHE_DIR, "transpiled_{}_{}_{}q_o{}_s{}.qpy".format(
+                    self.backend_name, fingerprint_glob, *key[2:])), keep=path)
+            except OSError:
+                pass
+        
+        mapping = mthree.utils.final_measurement_mapping(transpiled_qc)
+        self._TRANSPILE_CACHE[key] = (transpiled_qc, mapping)
+        return transpiled_qc, mapping
+
+    def _calibrate_mitigator(self, qubits: List[int]) -> None:
+        """
+        Make sure the M3 mitigator holds calibrations for the given physical qubits.
+        Calibrations already present in the shared mitigator are kept; otherwise a calibration file in `CACHE_DIR`
+        for the current backend calibration and younger than `CALIBRATION_MAX_AGE_HOURS` is loaded, and only if none exists the backend is calibrated
+        and the result is saved for later sessions.
+        Parameters:
+            qubits (List[int]): Physical qubits that need calibration.
+        """
+        def calibrated():
+            cals = self.mit.single_qubit_cals
+            return cals is not None and all(cals[qubit] is not None for qubit in qubits)
+        
+        if calibrated():
+            return
+        
+        qubits_hash = hashlib.sha1(",".join(map(str, qubits)).encode()).hexdigest()[:12]
+        prefix = os.path.join(CACHE_DIR, f"m3_{self.backend_name}_{self._target_fingerprint}_{qubits_hash}_")
+        
+        # Loading a file replaces every calibration in the mitigator, so it is only done while it holds none
+        if self.mit.single_qubit_cals is None:
+            cal_files = sorted(glob.glob(prefix + "*.json"), key=os.path.getmtime)
+            if cal_files and time.time() - os.path.getmtime(cal_files[-1]) < CALIBRATION_MAX_AGE_HOURS*3600:
+                self.mit.cals_from_file(cal_files[-1])
+                if calibrated():
+                    return
+        
+        self.mit.cals_from_system(qubits)
+        
+        # Persisting is best-effort: an unwritable cache directory only costs a recalibration next session
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            cal_file = prefix + time.strftime("%Y%m%d") + ".json"
+            self.mit.cals_to_file(cal_file)
+            
+            # Older calibrations of these qubits, for this or an earlier backend calibration, are superseded
+            fingerprint_glob = "?" * len(self._target_fingerprint)
+            self._prune_cache(os.path.join(CACHE_DIR, f"m3_{self.backend_name}_{fingerprint_glob}_{qubits_hash}_*.json"), keep=cal_file)
+        except OSError:
+            pass
 
+    @staticmethod
+    def _prune_cache(pattern: str, keep: str) -> None:
+        """
+        Remove the cache files matching `pattern`, except `keep`. Files that cannot be removed are left in place.
+        Parameters:
+            pattern (str): Glob pattern of the stale cache files.
+            keep (str): Path of the cache file just written.
+        """
+        for stale_path in glob.glob(pattern):
+            if stale_path != keep:
+                try:
+                    os.remove(stale_path)
+                except OSError:
+                    pass
 
     def _log_into_qiskit_runtime(self) -> None:
         """
@@ -135,7 +301,7 @@ class QuantumRandomNumberGenerator:
         available = self.service.backends()
         return available
 
-    def _run_and_correct(self, main_qc = None, rem_qc = None, num_shots=1024) -> mthree.classes.QuasiDistribution:
+    def _run_and_correct(self, main_qc = None, rem_qc = None, num_shots=1024) -> np.ndarray:
         """
         Run the circuit on the Aer simulator and apply M3 error mitigation corrections
         If `main_qc` is True, runs the main quantum circuit; otherwise, the remainder circuit (if available)        
@@ -144,17 +310,15 @@ class QuantumRandomNumberGenerator:
             rem_qc (bool): Whether to run the remainder circuit.
             num_shots (int): Number of shots for the circuit execution.
         Returns:
-            Quasi-distribution with error-mitigated counts.
+            Vector with the error-mitigated probability of each outcome, indexed by its integer value.
         """
         if main_qc is not None:
             transpiled_qc = self.transpiled_qc
             mapping = self.qc_mapping
-            self.mit.cals_from_system(mapping) # Perform error mitigation calibration based on the mapping
             
         elif rem_qc is not None:
             transpiled_qc = self.transpiled_rem_qc
             mapping = self.rem_qc_mapping
-            self.mit.cals_from_system(mapping) # Perform error mitigation calibration based on the mapping
         
         result = self.sampler.run([transpiled_qc],shots=num_shots).result()
         
@@ -162,17 +326,32 @@ class QuantumRandomNumberGenerator:
         counts = result[0].data.meas.get_counts()
         quasis = self.mit.apply_correction(counts,mapping)
         
-        return quasis
+        # The nearest probability distribution is converted to a dense vector once, here at the boundary
+        return self._to_dense(quasis.nearest_probability_distribution(), len(mapping))
     
-    def _gen_flattened_quasis_dict(self, main_qc: bool = None, rem_qc: bool = None, mitigation_level: float = 1 ) -> Dict:
+    def _run_raw(self, transpiled_qc: QuantumCircuit, n_runs=1, num_shots=1024) -> List[np.ndarray]:
         """
-        Generate and return a dictionary with quasi-probabilities obtained from multiple circuit runs,
-        applying randomized error mitigation via permuting the quasi-probabilities.
+        Run `n_runs` independent copies of the circuit on the Aer simulator in a single Sampler submission
+        and return the raw counts of each, without any error mitigation.
+        Parameters:
+            transpiled_qc (QuantumCircuit): Transpiled circuit to run.
+            n_runs (int): Number of independent runs (PUBs) to submit.
+            num_shots (int): Number of shots for each run.
+        Returns:
+            List with one vector of raw measured counts per run, indexed by the integer value of each outcome.
+        """
+        result = self.sampler.run([(transpiled_qc,)] * n_runs, shots=num_shots).result()
+        return [self._bits_to_dense(result[i].data.meas) for i in range(n_runs)]
 
-        This function runs a series of quantum circuits (either the main circuit or remainder circuit, or both),
-        collects the resulting quasi-probabilities, applies random permutations for error mitigation, and 
-        accumulates the permuted values across multiple iterations. The final result is a dictionary containing
-        the summed quasi-probabilities across all iterations.
+    def _gen_permuted_probabilities(self, main_qc: bool = None, rem_qc: bool = None, mitigation_level: float = 1 ) -> np.ndarray:
+        """
+        Generate and return a vector with probabilities obtained from a single high-shot circuit run,
+        applying randomized error mitigation via permuting the probabilities.
+
+        This function runs a quantum circuit (either the main circuit or the remainder circuit) once with
+        `iterations * 1024` shots, in place of `iterations` independent runs of 1024 shots each, corrects the
+        counts with M3, and applies a single random permutation to the resulting probability distribution
+        for error mitigation. The final result is a vector containing the permuted probabilities.
 
         Parameters:
             main_qc (bool): 
@@ -182,125 +361,185 @@ class QuantumRandomNumberGenerator:
                 If True, the remainder circuit will be executed.
             
             mitigation_level (float): 
-                A float between 0 and 1 (inclusive), specifying the fraction of total permutations to run.
-                A value of 1 means the maximum number of permutations will be applied; a value closer to 0 
-                will apply fewer permutations (but still greater than 0). Default is 1.
+                A float between 0 and 1 (inclusive) that scales the shot count. The circuit is run with
+                `ceil(mitigation_level * 2**n) * 1024` shots, where `n` is its number of qubits; a value closer
+                to 0 uses fewer shots (but still at least 1024). Default is 1.
 
         Returns:
-            Dict:
-                A dictionary where keys represent the possible outcomes of the quantum circuit,
-                and values are the summed quasi-probabilities from all iterations. Each key in the dictionary 
-                corresponds to a unique outcome, and the values represent the accumulated quasi-probabilities 
-                after applying random permutations across multiple correction iterations.
+            np.ndarray:
+                A vector indexed by the integer value of the possible outcomes of the quantum circuit,
+                holding the M3-corrected distribution of all shots, projected onto the nearest probability
+                distribution. Each entry of the vector corresponds to a unique outcome, and the values 
+                represent its probability after applying the random permutation.
         
         Raises:
             ValueError:
                 If the provided mitigation_level is not within the valid range (0, 1].
 
         Example:
-            _gen_flattened_quasis_dict(main_qc=True, rem_qc=False, mitigation_level=0.8)
-                Returns a dictionary of summed quasi-probabilities after running 80% of the total correction permutations
-                using the main quantum circuit, with error mitigation applied via random permutations.
+            _gen_permuted_probabilities(main_qc=True, rem_qc=False, mitigation_level=0.8)
+                Returns a vector of probabilities after running 80% of the maximum shot count
+                on the main quantum circuit, with error mitigation applied via a random permutation.
         """
         
         # Validate the mitigation level to ensure it is within the range (0, 1]
         if not (0 < mitigation_level <= 1):
             raise ValueError("Mitigation level must be within (0,1] interval.")
         
-        # Determine the number of permutations to apply based on the mitigation level and circuit selection
+        # Determine the shot count, in units of 1024 shots, based on the mitigation level and circuit selection
         if main_qc is not None:
             iterations = math.ceil(mitigation_level*self.main_correction_permutations)
             
         elif rem_qc is not None:
             iterations = math.ceil(mitigation_level*self.rem_correction_permutations)
         
-        corrected_counts = [] # Initialize an empty list to store corrected quasi-probabilities
+        # A single run with `iterations` times the shots replaces `iterations` separate runs of 1024 shots
+        quasis = self._run_and_correct(main_qc = main_qc, rem_qc = rem_qc, num_shots = iterations*1024) # Run the circuit and perform M3 mitigation
         
-        # Perform the specified number of permutations
-        for _ in range(iterations):
-            quasis = self._run_and_correct(main_qc = main_qc, rem_qc = rem_qc) # Run the circuit and perform M3 mitigation
-            values = list(quasis.values()) # Extract the quasi-probabilities (values) from the dictionary
-            
-            # Randomly permute quasi-probabilities on each iteration for unbiased error mitigation
-            random.shuffle(values) # Shuffle the quasi-probabilities to simulate error mitigation
-            
-            # Recreate the quasi-probabilities dictionary with permuted values
-            permuted_quasis = dict(zip(quasis.keys(), values))
-            corrected_counts.append(permuted_quasis) # Append the permuted dictionary to the list of corrected counts
-            
-        flattened_counts = {key: 0 for key in corrected_counts[0].keys()} # Initialize an empty dictionary to store the sums
-
-        # Sum the quasi-probabilities across all iterations for each possible outcome
-        for counts in corrected_counts:
-            for key, value in counts.items():
-                flattened_counts[key] += value # Summing across iterations for each possible outcome
+        # Randomly permute the probabilities once, so that no outcome is tied to the qubits (and gate errors) it was measured on;
+        # the position of the most likely outcome, and hence the selected number, is then drawn uniformly by `self._rng`
+        permuted_probabilities = quasis[self._rng.permutation(quasis.shape[0])]
         
-        # Return the accumulated, flattened quasi-probabilities
-        return flattened_counts
+        # Return the permuted probabilities
+        return permuted_probabilities
     
-    def _select_number(self, counts: Dict) -> str:
+    def _select_number(self, counts: np.ndarray) -> int:
         """
         Choose the outcome with the highest quasi-probability count within the allowed range.
         This approach ensures a valid outcome within `num_possible_outcomes`.
         Parameters:
-            counts (Dict): Corrected counts of measured outcomes.
+            counts (np.ndarray): Counts of measured outcomes as a dense vector indexed by the integer outcome.
         
         Returns:
-            Binary string representing the selected outcome.
+            Integer representing the selected outcome.
         """
-        # Filter the dictionary to keep only items where the key is less than or equal to the comparison key
-        filtered_counts = {k: v for k, v in counts.items() if k <= self.max_number_bin}
+        # Outcomes are indexed by their integer value, so the allowed range is a plain slice
+        allowed = counts[:self._cutoff]
         
-        max_key = max(filtered_counts, key=filtered_counts.get) # Find the key with the maximum value
+        # Raw shot counts tie often; np.argmax would always favour the lowest outcome, so ties are broken uniformly at random
+        return int(self._rng.choice(np.flatnonzero(allowed == allowed.max())))
+
+    @staticmethod
+    def _to_dense(counts: Dict, width: int) -> np.ndarray:
+        """
+        Convert a dictionary of counts keyed by binary strings into a dense vector
+        indexed by the integer value of each binary string.
+
+        Parameters:
+            counts (Dict): Dictionary with quasi-distribution counts.
+            width (int): Number of bits of the keys.
+            
+        Returns:
+            Vector of length 2**width.
+        """
+        indices = np.fromiter((int(key, 2) for key in counts), dtype=np.int64, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
         
-        return max_key
+        # Fill the preallocated vector in a single vectorized assignment; the keys are unique
+        # Single precision is plenty to tell the most likely outcome apart and halves the memory traffic
+        dense = np.zeros(2**width, dtype=np.float32)
+        dense[indices] = values
+        return dense
 
-    def _merge_counts(self, *all_counts) -> Dict:
+    @staticmethod
+    def _bits_to_dense(bit_array) -> np.ndarray:
         """
-        Merging multiple quasi-distribution counts from different circuit runs
-        Concatenates binary keys from each count dict, combining results from multiple runs
+        Convert the measured bits of a Sampler result into a dense vector of counts
+        indexed by the integer value of each outcome.
 
         Parameters:
-            all_counts: Sequence of dictionaries with quasi-distribution counts.
+            bit_array (BitArray): Measured bits of a Sampler result.
             
         Returns:
-            Merged dictionary with concatenated keys and multiplied values.
+            Vector of length 2**num_bits.
         """
-        merged_counts = all_counts[0] # Start with the first dictionary in all_counts
+        counts = bit_array.get_int_counts()
+        dense = np.zeros(2**bit_array.num_bits, dtype=np.float32)
+        dense[list(counts.keys())] = list(counts.values())
+        return dense
 
-        # Iterate through the remaining dictionaries
-        for next_dict in all_counts[1:]:
-            new_merged_counts = {} # Initialize an empty dictionary to hold the new merged counts
+    def _merge_and_select(self, *all_counts) -> int:
+        """
+        Merging multiple quasi-distribution counts from different circuit runs and selecting the outcome
+        with the highest joint probability within the allowed range.
+        The joint distribution is the outer product of the counts, with the first one providing the most
+        significant bits of each outcome, but it is never materialized: its maximum is found block by block.
+
+        Parameters:
+            all_counts: Sequence of dense vectors with non-negative counts or probabilities.
+            
+        Returns:
+            Integer representing the selected outcome.
+        """
+        return self._argmax_product(list(all_counts), self._cutoff, self._rng)[1]
 
-            # Perform pairwise merging of `merged_counts` and `next_dict`
-            for key1, value1 in merged_counts.items():
-                for key2, value2 in next_dict.items():
-                    combined_key = key1 + key2  # Concatenate keys to form a longer key
-                    new_merged_counts[combined_key] = value1 * value2   # Multiply quasi-probabilities
-                    
-            # Update merged_counts with the new merged result
-            merged_counts = new_merged_counts
+    @staticmethod
+    def _argmax_product(vectors: List[np.ndarray], cutoff: int, rng: np.random.Generator) -> Tuple[float, int, int]:
+        """
+        Find the maximum among the first `cutoff` entries of the flattened outer product of non-negative `vectors`.
+        Entry `i * len(rest) + j` of the product is `vectors[0][i]` times entry `j` of the product of the remaining vectors,
+        so the complete rows are handled with the maximum of the remaining product, and only the last, partial row recurses.
+        Ties are broken uniformly at random among all maximal entries.
 
-        # Return the fully merged dictionary
-        return merged_counts
+        Parameters:
+            vectors (List[np.ndarray]): Non-negative vectors of the outer product, most significant first.
+            cutoff (int): Number of leading entries of the flattened product to consider.
+            rng (np.random.Generator): Random generator used to break ties.
+            
+        Returns:
+            Tuple with the maximum value, its index in the flattened product and the number of entries tied at the maximum.
+        """
+        head = vectors[0]
+        if len(vectors) == 1:
+            allowed = head[:cutoff]
+            tied = np.flatnonzero(allowed == allowed.max())
+            return float(allowed[tied[0]]), int(rng.choice(tied)), len(tied)
+        
+        rest = vectors[1:]
+        rest_size = math.prod(vector.shape[0] for vector in rest)
+        full_rows, partial = divmod(cutoff, rest_size)
+        candidates = []
+        
+        # Products are formed with Python floats (double precision) so that equal products compare equal
+        if full_rows > 0:
+            rest_value, rest_index, rest_ties = QuantumRandomNumberGenerator._argmax_product(rest, rest_size, rng)
+            leading = head[:full_rows]
+            rows = np.flatnonzero(leading == leading.max())
+            row = int(rng.choice(rows))
+            candidates.append((float(leading[row]) * rest_value, row * rest_size + rest_index, len(rows) * rest_ties))
+        
+        if partial > 0:
+            value, rest_index, ties = QuantumRandomNumberGenerator._argmax_product(rest, partial, rng)
+            candidates.append((float(head[full_rows]) * value, full_rows * rest_size + rest_index, ties))
+        
+        # Pick among the tied candidates proportionally to how many entries each one stands for
+        # (a maximum of zero, i.e. no allowed outcome was ever observed, is not counted exactly)
+        best_value = max(candidate[0] for candidate in candidates)
+        tied = [candidate for candidate in candidates if candidate[0] == best_value]
+        weights = np.array([candidate[2] for candidate in tied], dtype=np.float64)
+        _, index, _ = tied[int(rng.choice(len(tied), p=weights / weights.sum()))]
+        return best_value, index, int(weights.sum())
         
     def fast_random_number(self) -> int:
         """
-        Generate a random number faster by skipping gate error mitigation
+        Generate a random number faster by skipping gate and measurement error mitigation
         
         Returns:
-            Random integer based on the quantum sampling output.
+            Random integer based on the raw quantum sampling output.
         """
         if self.single_circuit:
-            result = self._select_number(self._run_and_correct(main_qc=True))
+            result = self._select_number(self._run_raw(self.transpiled_qc)[0])
         else:
-            results = []
-            for _ in range(self.quotient):
-                results.append(self._run_and_correct(main_qc=True))
-            if self.remainder_circuits:
-                results.append(self._run_and_correct(rem_qc=True))
-            result = self._select_number(self._merge_counts(*results))
-        return int(result,2)
+            # The blocks are independent jobs, so they are submitted concurrently
+            with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS) as executor:
+                main_future = executor.submit(self._run_raw, self.transpiled_qc, self.quotient)
+                if self.remainder_circuits:
+                    rem_future = executor.submit(self._run_raw, self.transpiled_rem_qc)
+                results = main_future.result()
+                if self.remainder_circuits:
+                    results.extend(rem_future.result())
+            result = self._merge_and_select(*results)
+        return result
         
     def gate_error_mit_random_number(self, mitigation_level = 1) -> int:
         """
@@ -310,12 +549,15 @@ class QuantumRandomNumberGenerator:
             Random integer with error-mitigated quasi-probability values.
         """
         if self.single_circuit:
-            result = self._select_number(self._gen_flattened_quasis_dict(main_qc=True,mitigation_level=mitigation_level))
+            result = self._select_number(self._gen_permuted_probabilities(main_qc=True,mitigation_level=mitigation_level))
         else:
-            results = []
-            for _ in range(self.quotient):
-                results.append(self._gen_flattened_quasis_dict(main_qc=True,mitigation_level=mitigation_level))
-            if self.remainder_circuits:
-                results.append(self._gen_flattened_quasis_dict(rem_qc=True,mitigation_level=mitigation_level))
-            result = self._select_number(self._merge_counts(*results))
-        return int(result,2)
\ No newline at end of file
+            # The blocks are independent jobs, so they are submitted concurrently and each one
+            # is post-processed as soon as it returns while the others are still executing
+            with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS) as executor:
+                futures = [executor.submit(self._gen_permuted_probabilities, main_qc=True, mitigation_level=mitigation_level)
+                           for _ in range(self.quotient)]
+                if self.remainder_circuits:
+                    futures.append(executor.submit(self._gen_permuted_probabilities, rem_qc=True, mitigation_level=mitigation_level))
+                results = [future.result() for future in futures]
+            result = self._merge_and_select(*results)
+        return result
\ No newline at end of file
@@ -0,0 +1,52 @@
+import collections
+import os
+import sys
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+# The qiskit stack is only needed to talk to backends; stub it when it is not installed so the
+# classical post-processing of `QuantumRandomNumberGenerator` can be tested on its own
+for module in ("mthree", "qiskit", "qiskit.transpiler", "qiskit.transpiler.preset_passmanagers",
+               "qiskit_aer", "qiskit_ibm_runtime"):
+    try:
+        __import__(module)
+    except ImportError:
+        sys.modules[module] = MagicMock()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qrng import QuantumRandomNumberGenerator
+
+
+def test_argmax_product_matches_outer_product():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        vectors = [rng.integers(0, 4, 2**int(rng.integers(1, 4))).astype(np.float32) for _ in range(3)]
+        joint = np.multiply.outer(np.multiply.outer(vectors[0], vectors[1]), vectors[2]).ravel()
+        cutoff = int(rng.integers(1, joint.shape[0] + 1))
+        
+        value, index, ties = QuantumRandomNumberGenerator._argmax_product(vectors, cutoff, rng)
+        
+        assert index < cutoff
+        assert value == joint[:cutoff].max() == joint[index]
+        if value > 0:
+            assert ties == np.count_nonzero(joint[:cutoff] == value)
+
+
+def test_argmax_product_breaks_ties_uniformly():
+    rng = np.random.default_rng(3)
+    vectors = [np.array([1., 1., 0., 1.]), np.array([2., 2.])]
+    
+    # Entries 0, 1, 2, 3 and 6 of the product are tied at the maximum within the first 7 entries
+    picks = collections.Counter(QuantumRandomNumberGenerator._argmax_product(vectors, 7, rng)[1] for _ in range(5000))
+    
+    assert set(picks) == {0, 1, 2, 3, 6}
+    assert min(picks.values()) > 850
+
+
+def test_rejects_fewer_than_one_outcome():
+    for num_possible_outcomes in (0, -3):
+        with pytest.raises(ValueError):
+            QuantumRandomNumberGenerator(num_possible_outcomes)